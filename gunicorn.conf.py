@@ -0,0 +1,40 @@
+# gunicorn 配置：工作进程启动时创建求解环境池，退出时释放；内存超限时回收工作进程
+import os
+
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# 兜底：处理一定数量请求后重启工作进程（0 表示不启用）
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# 工作进程RSS超过该值（MB）后，处理完当前请求即优雅退出并由主进程重新拉起（0 表示不启用）
+MAX_WORKER_RSS_MB = float(os.environ.get('MAX_WORKER_RSS_MB', 0))
+
+
+def post_worker_init(worker):
+    from optimization.env_pool import init_pool
+    # 以 gunicorn 实际生效的配置（含命令行 -w/--threads）确定池大小和每个求解的线程数
+    size = int(os.environ.get('SOLVER_ENV_POOL_SIZE', 0)) or worker.cfg.threads
+    pool = init_pool(size=size, workers=worker.cfg.workers)
+    worker.log.info(f"Solver env pool ready: size={pool.size}, threads per solve={pool.threads}, "
+                    f"time limit={pool.time_limit}s, mem limit={pool.mem_limit_gb}GB")
+    # tracemalloc 的峰值是进程级的，多线程工作进程中并发请求会互相干扰
+    if worker.cfg.threads > 1:
+        from utils.memory import disable_heap_tracing
+        if disable_heap_tracing():
+            worker.log.warning(f"Python heap tracing disabled: worker runs {worker.cfg.threads} threads")
+
+
+def post_request(worker, req, environ, resp):
+    if not MAX_WORKER_RSS_MB:
+        return
+    from utils.memory import current_rss_bytes
+    rss_mb = current_rss_bytes() / 2 ** 20
+    if rss_mb > MAX_WORKER_RSS_MB:
+        worker.log.warning(f"Worker {worker.pid} RSS {rss_mb:.1f}MB exceeds {MAX_WORKER_RSS_MB}MB, recycling")
+        worker.alive = False
+
+
+def worker_exit(server, worker):
+    from optimization.env_pool import close_pool
+    close_pool()
@@ -1,12 +1,14 @@
 #主程序
-from models.user import UserRequirements
+from models.user import PLANNING_TYPES, SUBJECTS, UserRequirements
 from utils.data_loader import CourseDataLoader
 from utils.constraints import CourseConstraints
 from optimization.scheduler import CourseScheduler
+from utils.profiling import profile_solve
+import argparse
 import re
 import traceback
 
-def main():
+def main(profile_dir=None):
     # 加载课程数据
     data_loader = CourseDataLoader('all_courses.json')
     
@@ -39,12 +41,7 @@ def main():
     print("3. 专注深化 - 在特定领域深入学习")
     print("4. 极限挑战 - 最大化学习强度和学分获取")
     planning_choice = input("请选择（1-4）：")
-    planning_types = {
-        "1": "Minimal Effort",
-        "2": "Balanced Workload",
-        "3": "Focused Depth",
-        "4": "Maximum Intensity"
-    }
+    planning_types = {str(i): planning_type for i, planning_type in enumerate(PLANNING_TYPES, 1)}
     planning_type = planning_types.get(planning_choice, "Minimal Effort")
     
     # 如果选择适度均衡，需要输入目标学分
@@ -54,29 +51,11 @@ def main():
     
     # 新增：学科偏好选择
     print("\n请选择您感兴趣的学科子领域（最多选择3个）：")
-    print("1. 量化金融与金融工程")
-    print("2. 数理研究")
-    print("3. 投资与资产管理")
-    print("4. 财务分析")
-    print("5. 宏观金融与经济政策")
-    print("6. 金融经济学")
-    print("7. 组织管理")
-    print("8. 市场营销")
-    print("9. 中国经济社会研究")
+    subject_map = {str(i): subject for i, subject in enumerate(SUBJECTS, 1)}
+    for choice, subject in subject_map.items():
+        print(f"{choice}. {subject}")
     print("0. 完成选择")
     
-    subject_map = {
-        "1": "量化金融与金融工程",
-        "2": "数理研究",
-        "3": "投资与资产管理",
-        "4": "财务分析",
-        "5": "宏观金融与经济政策",
-        "6": "金融经济学",
-        "7": "组织管理",
-        "8": "市场营销",
-        "9": "中国经济社会研究"
-    }
-    
     preferred_subjects = list()
     while len(preferred_subjects) < 3:
         choice = input(f"请选择（已选择{len(preferred_subjects)}个，输入0完成选择）：")
@@ -113,7 +92,14 @@ def main():
     
     try:
         # 求解优化问题
-        schedule = scheduler.solve()
+        if profile_dir:
+            schedule, profile_bundle = profile_solve(scheduler, profile_dir)
+            print(f"\n性能剖析结果已保存至：{profile_bundle['path']}")
+            print(f"建模耗时：{profile_bundle['create_model_seconds']:.3f}秒，"
+                  f"求解耗时：{profile_bundle['solve_seconds']:.3f}秒")
+            print(f"模型规模：{profile_bundle['model_size']}")
+        else:
+            schedule = scheduler.solve()
         
         # 输出结果
         print("\n推荐课表：")
@@ -138,4 +124,8 @@ def main():
         print(f"完整错误信息:\n{error_info}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="光华管理学院金融系选课推荐系统")
+    parser.add_argument('--profile', nargs='?', const='profiles', default=None, metavar='DIR',
+                        help="剖析建模与求解过程，结果保存到DIR（默认 profiles/）")
+    args = parser.parse_args()
+    main(args.profile)
\ No newline at end of file
@@ -1,6 +1,14 @@
 from dataclasses import dataclass
 from typing import List, Optional, Set
 
+# 总体规划类型
+PLANNING_TYPES = ["Minimal Effort", "Balanced Workload", "Focused Depth", "Maximum Intensity"]
+# 可选的偏好学科子领域（新生预计算表按此顺序编码位置，修改后需重建）
+SUBJECTS = [
+    "量化金融与金融工程", "数理研究", "投资与资产管理", "财务分析", "宏观金融与经济政策",
+    "金融经济学", "组织管理", "市场营销", "中国经济社会研究"
+]
+
 @dataclass
 class UserRequirements:
     """用户需求模型"""
@@ -15,6 +23,7 @@ class UserRequirements:
     target_credits_per_semester: Optional[int] = None  # 每学期目标学分（仅用于适度均衡类型）
     preferred_subjects: Set[str] = None  # 偏好的学科子领域
     upperbound_credits: int = 20  # 每学期上限学分
+    program: Optional[str] = None  # 培养方案标识（None表示默认方案）
 
     def __post_init__(self):
         if self.completed_courses is None:
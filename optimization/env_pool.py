@@ -0,0 +1,111 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+import gurobipy as gp
+
+
+def available_cpus() -> int:
+    """当前进程可用的CPU核数"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def threads_per_solve(workers: int, concurrent_solves: int) -> int:
+    """按 每核数 / (工作进程数 × 每进程并发求解数) 分配求解线程，避免CPU超额订阅"""
+    return max(1, available_cpus() // max(1, workers * concurrent_solves))
+
+
+def create_env(threads: Optional[int] = None, output_flag: Optional[int] = None,
+               time_limit: Optional[float] = None, mem_limit_gb: Optional[float] = None) -> gp.Env:
+    """创建并启动求解环境；各参数为None时使用Gurobi默认值"""
+    env = gp.Env(empty=True)
+    if output_flag is not None:
+        env.setParam('OutputFlag', output_flag)
+    if threads:
+        env.setParam('Threads', threads)
+    if time_limit:
+        env.setParam('TimeLimit', time_limit)
+    if mem_limit_gb:
+        env.setParam('MemLimit', mem_limit_gb)
+    env.start()
+    return env
+
+
+class SolverEnvPool:
+    """
+    求解环境池
+
+    每个工作进程启动时创建固定数量的Gurobi环境并在请求间复用，
+    避免每次请求重复初始化环境和许可证。time_limit（秒）和 mem_limit_gb 限制单次求解的资源占用。
+    """
+
+    def __init__(self, size: int = 1, threads: Optional[int] = None,
+                 time_limit: Optional[float] = None, mem_limit_gb: Optional[float] = None):
+        self.size = size
+        self.threads = threads
+        self.time_limit = time_limit
+        self.mem_limit_gb = mem_limit_gb
+        self._envs = queue.Queue()
+        for _ in range(size):
+            self._envs.put(create_env(threads, time_limit=time_limit, mem_limit_gb=mem_limit_gb))
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """借出一个环境，使用完毕后自动归还"""
+        env = self._envs.get(timeout=timeout)
+        try:
+            yield env
+        finally:
+            self._envs.put(env)
+
+    def close(self) -> None:
+        """释放所有环境"""
+        while not self._envs.empty():
+            self._envs.get_nowait().dispose()
+
+
+_pool: Optional[SolverEnvPool] = None
+_pool_lock = threading.Lock()
+
+
+def init_pool(size: Optional[int] = None, workers: Optional[int] = None) -> SolverEnvPool:
+    """
+    创建当前进程的环境池（幂等）
+
+    size 默认取 SOLVER_ENV_POOL_SIZE（或 gunicorn 的 GUNICORN_THREADS），
+    workers 默认取 WEB_CONCURRENCY；每个求解使用的线程数可由 SOLVER_THREADS 覆盖。
+    单次求解的时间和内存上限取 SOLVER_TIME_LIMIT（秒，默认30）和 SOLVER_MEM_LIMIT_GB（默认1），设为0表示不限制。
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if size is None:
+                size = int(os.environ.get('SOLVER_ENV_POOL_SIZE',
+                                          os.environ.get('GUNICORN_THREADS', 1)))
+            if workers is None:
+                workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+            threads = int(os.environ.get('SOLVER_THREADS', 0)) or threads_per_solve(workers, size)
+            _pool = SolverEnvPool(
+                size, threads,
+                time_limit=float(os.environ.get('SOLVER_TIME_LIMIT', 30)) or None,
+                mem_limit_gb=float(os.environ.get('SOLVER_MEM_LIMIT_GB', 1)) or None
+            )
+        return _pool
+
+
+def get_pool() -> SolverEnvPool:
+    """获取当前进程的环境池，未初始化时按默认配置创建"""
+    return _pool if _pool is not None else init_pool()
+
+
+def close_pool() -> None:
+    """释放当前进程的环境池"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -1,11 +1,24 @@
+import contextlib
+import io
 import gurobipy as gp
 from typing import List, Dict
-from models.course import Course
+from models.course import Course, extract_number
 from models.schedule import SemesterSchedule, CompleteSchedule
 from models.user import UserRequirements
 from utils.constraints import CourseConstraints
 from utils.data_loader import CourseDataLoader
-from utils.graduation_requirements import GraduationRequirements
+from utils.graduation_requirements import CompiledProgram, default_registry
+from optimization.solver_params import load_solver_params
+
+# 启动时加载调参得到的各规划类型求解器参数
+SOLVER_PARAMS = load_solver_params()
+
+# 模型版本：修改约束或优化目标时递增，离线预计算表据此判断是否需要重建
+MODEL_VERSION = 1
+
+class SolveLimitError(Exception):
+    """求解超出时间或内存上限"""
+    pass
 
 class CourseScheduler:
     """课程调度优化器"""
@@ -13,18 +26,83 @@ class CourseScheduler:
     def __init__(self, 
                  user_requirements: UserRequirements,
                  data_loader: CourseDataLoader,
-                 constraints: CourseConstraints):
+                 constraints: CourseConstraints,
+                 stub_solver: bool = False,
+                 program: CompiledProgram = None,
+                 env: gp.Env = None,
+                 symmetry_breaking: bool = False,
+                 solver_params: Dict = None):
         self.user_requirements = user_requirements
         self.data_loader = data_loader
         self.constraints = constraints
+        # 编译后的培养方案，未指定时按用户选择的方案从默认注册表获取
+        self.program = program or default_registry.compile(user_requirements.program, data_loader)
+        self.stub_solver = stub_solver  # 仅建模不求解，用于压测时剥离求解耗时
+        self.env = env  # 复用的求解环境，None时使用Gurobi默认环境
+        # 是否对可互换课程添加对称性破除约束（尚无求解时间评估数据，默认关闭）
+        self.symmetry_breaking = symmetry_breaking
+        # 求解器参数，未指定时使用调参文件中该规划类型的配置
+        if solver_params is None:
+            solver_params = SOLVER_PARAMS.get(user_requirements.planning_type, {})
+        self.solver_params = solver_params
         self.model = None
     
+    def dispose(self) -> None:
+        """释放模型占用的求解器内存"""
+        if self.model is not None:
+            self.model.dispose()
+            self.model = None
+    
+    def find_interchangeable_courses(self, courses: Dict[int, Course]) -> List[List[int]]:
+        """
+        找出模型中完全可互换的课程等价类
+
+        同一类中的课程学分、开课学期、上课时间、（可选范围内的）先修课程、培养方案类别
+        以及是否属于偏好学科均相同，且不是必修课、不是其他课程的先修课，
+        因此任意交换它们的选课方案得到的目标值和可行性都相同。
+        每类按匹配偏好学科数从多到少、课程ID从小到大排序，求解时按此顺序取课。
+        """
+        available_names = {course.name for course in courses.values()}
+        prerequisite_names = {prereq for course in courses.values() for prereq in course.prerequisites}
+        fixed_ids = set(self.program.required_ids) | set(self.program.first_semester_ids)
+        category_of = {course_id: key
+                       for key, ids in self.program.category_ids.items()
+                       for course_id in ids}
+        preferred = set(self.user_requirements.preferred_subjects)
+        
+        classes: Dict[tuple, List[int]] = {}
+        for course_id, course in courses.items():
+            if course_id in fixed_ids or course.name in prerequisite_names:
+                continue
+            offered = 'any' if len(course.semester) > 1 else course.semester[0] % 2
+            times = tuple(sorted(
+                (t.weekday, *(extract_number(p) for p in t.period.split('-')))
+                for t in course.times
+            ))
+            prereqs = frozenset(p for p in course.prerequisites if p in available_names)
+            key = (category_of.get(course_id), course.credits, offered, times, prereqs,
+                   bool(preferred & set(course.subject_category)))
+            classes.setdefault(key, []).append(course_id)
+        
+        return [
+            sorted(members, key=lambda c: (-len(preferred & set(courses[c].subject_category)), c))
+            for members in classes.values() if len(members) > 1
+        ]
+    
+    def apply_solver_params(self) -> None:
+        """设置求解器参数；Threads 不超过求解环境已分配的线程数"""
+        for name, value in self.solver_params.items():
+            if name == 'Threads' and self.model.Params.Threads > 0:
+                value = min(value, self.model.Params.Threads)
+            self.model.setParam(name, value)
+    
     def create_model(self):
         """创建优化模型"""
         print("开始创建优化模型...")  # 调试信息
         print("用户需求:", self.user_requirements)  # 调试信息
         
-        self.model = gp.Model("Course_Scheduling")
+        self.model = gp.Model("Course_Scheduling", env=self.env)
+        self.apply_solver_params()
         
         # 获取可用课程
         available_courses = self.data_loader.get_available_courses(
@@ -130,86 +208,59 @@ class CourseScheduler:
                                 gp.quicksum(x[courses_name[prereq].id, s] for s in range(semesters[0], semester)) >= x[course, semester]
                             )
         
+        # 5.1 对称性破除：同一等价类中的课程按顺序选取（前一门未选则后一门不选，
+        #     且前一门的学期不晚于后一门），消除分支定界中等价排列的重复搜索
+        if self.symmetry_breaking:
+            for members in self.find_interchangeable_courses(courses):
+                for first, second in zip(members, members[1:]):
+                    taken_first = gp.quicksum(x[first, semester] for semester in semesters)
+                    taken_second = gp.quicksum(x[second, semester] for semester in semesters)
+                    self.model.addConstr(taken_first >= taken_second)
+                    self.model.addConstr(
+                        gp.quicksum(semester * x[first, semester] for semester in semesters)
+                        <= gp.quicksum(semester * x[second, semester] for semester in semesters)
+                        + semesters[-1] * (1 - taken_second)
+                    )
+        
         # 6. 毕业要求约束
         # 6.1 必修课程约束
-        for required_course in GraduationRequirements.REQUIRED_COURSES:
-            if required_course not in courses_name:
+        for required_id in self.program.required_ids:
+            if required_id not in courses:
                 continue
-            temp_id = courses_name[required_course].id
             self.model.addConstr(
-                gp.quicksum(x[temp_id, semester] for semester in semesters) == 1
+                gp.quicksum(x[required_id, semester] for semester in semesters) == 1
             )
         
-        # 6.2 金融选修课程约束（至少12学分）
-        already_selected_credits = sum([course.credits for course in self.user_requirements.completed_courses 
-                                        if course in GraduationRequirements.FINANCE_ELECTIVE_COURSES])
-        finance_elective_courses = [course for course in courses.keys() 
-                                 if courses[course].name in GraduationRequirements.FINANCE_ELECTIVE_COURSES]
-        self.model.addConstr(
-            gp.quicksum(
-                courses[course].credits * x[course, semester]
-                for course in finance_elective_courses
-                for semester in semesters
-            ) >= GraduationRequirements.FINANCE_ELECTIVE_CREDITS_REQUIRED  - already_selected_credits
-        )
-        
-        # 6.3 中国相关课程约束（至少4学分）
-        already_selected_credits = sum([course.credits for course in self.user_requirements.completed_courses 
-                                        if course in GraduationRequirements.CHINA_RELATED_COURSES])
-        china_related_courses = [course for course in courses.keys()
-                               if courses[course].name in GraduationRequirements.CHINA_RELATED_COURSES]
-        self.model.addConstr(
-            gp.quicksum(
-                courses[course].credits * x[course, semester]
-                for course in china_related_courses
-                for semester in semesters
-            ) >= GraduationRequirements.CHINA_RELATED_CREDITS_REQUIRED - already_selected_credits
-        )
-        
-        # 6.4 其他选修课程约束（至少8学分）
-        already_selected_credits = sum([course.credits for course in self.user_requirements.completed_courses 
-                                        if course in GraduationRequirements.OTHER_ELECTIVE_COURSES])
-        other_elective_courses = [course for course in courses.keys()
-                                if courses[course].name in GraduationRequirements.OTHER_ELECTIVE_COURSES]
-        self.model.addConstr(
-            gp.quicksum(
-                courses[course].credits * x[course, semester]
-                for course in other_elective_courses
-                for semester in semesters
-            ) >= GraduationRequirements.OTHER_ELECTIVE_CREDITS_REQUIRED - already_selected_credits
-        )
+        # 6.2 各类选修课程学分约束（金融选修12学分、中国相关4学分、其他选修8学分等）
+        for category in self.program.credit_categories:
+            already_selected_credits = self.program.completed_credits(
+                category.key, self.user_requirements.completed_courses
+            )
+            category_courses = [course for course in self.program.category_ids[category.key]
+                                if course in courses]
+            self.model.addConstr(
+                gp.quicksum(
+                    courses[course].credits * x[course, semester]
+                    for course in category_courses
+                    for semester in semesters
+                ) >= category.credits_required - already_selected_credits
+            )
         
         # 7. 不出国时的必修课程约束（前三年完成）
         if not self.user_requirements.study_abroad:
             if semesters[0] <= 6:
-                required_courses = [course for course in courses.values() 
-                              if course.name in GraduationRequirements.REQUIRED_COURSES]
+                required_courses = [course for course in self.program.required_ids if course in courses]
                 for course in required_courses:
                     # 确保必修课程在前6个学期完成
                     self.model.addConstr(
-                        gp.quicksum(x[course.id, semester] for semester in range(semesters[0], 7)) == 1
+                        gp.quicksum(x[course, semester] for semester in range(semesters[0], 7)) == 1
                     )
         
-        # 8. 新生第一学期必须选择经济学和光华第一课和组织与管理
+        # 8. 新生第一学期必须选择培养方案指定的课程（经济学、光华第一课、组织与管理）
         if self.user_requirements.is_freshman:
-            # 找到经济学和光华第一课的课程ID
-            economics_id = None
-            first_course_id = None
-            zuzhi_id = None
-            for course_id, course in courses.items():
-                if course.name == "经济学":
-                    economics_id = course_id
-                elif course.name == "光华第一课":
-                    first_course_id = course_id
-                elif course.name == "组织与管理":
-                    zuzhi_id = course_id
-            # 添加约束：这两门课必须在第一学期选择
-            if economics_id is not None:
-                self.model.addConstr(x[economics_id, 1] == 1)
-            if first_course_id is not None:
-                self.model.addConstr(x[first_course_id, 1] == 1)
-            if zuzhi_id is not None:
-                self.model.addConstr(x[zuzhi_id, 1] == 1)
+            for course_id in self.program.first_semester_ids:
+                if course_id in courses:
+                    self.model.addConstr(x[course_id, 1] == 1)
         
         # 设置目标函数
         # 1. 根据规划类型设置主要目标
@@ -281,11 +332,22 @@ class CourseScheduler:
         
         print("优化模型创建完成")  # 调试信息
     
-    def solve(self) -> CompleteSchedule:
-        """求解优化问题"""
+    def solve(self, quiet: bool = False) -> CompleteSchedule:
+        """求解优化问题；quiet 为True时屏蔽建模调试输出（离线批量求解用）"""
+        if quiet:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return self.solve()
         if self.model is None:
             self.create_model()
         
+        if self.stub_solver:
+            # 桩求解模式：只完成建模，返回空课表
+            self.model.update()
+            return CompleteSchedule({
+                semester: SemesterSchedule(semester, [])
+                for semester in range(9 - self.user_requirements.get_remaining_semesters(), 9)
+            })
+        
         self.model.optimize()
         
         if self.model.status == gp.GRB.OPTIMAL:
@@ -310,5 +372,8 @@ class CourseScheduler:
                 schedules[semester] = SemesterSchedule(semester, semester_courses)
             
             return CompleteSchedule(schedules)
+        elif self.model.status in (gp.GRB.TIME_LIMIT, gp.GRB.MEM_LIMIT):
+            limit = '时间' if self.model.status == gp.GRB.TIME_LIMIT else '内存'
+            raise SolveLimitError(f"求解超出{limit}上限")
         else:
             raise Exception("No optimal solution found") 
\ No newline at end of file
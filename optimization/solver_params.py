@@ -0,0 +1,32 @@
+import hashlib
+import json
+import os
+from typing import Dict
+
+# 调参工具输出的求解器参数文件，可用 SOLVER_PARAMS_FILE 环境变量指定其他路径
+SOLVER_PARAMS_FILE = os.environ.get(
+    'SOLVER_PARAMS_FILE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'solver_params.json')
+)
+
+
+def load_solver_params(path: str = SOLVER_PARAMS_FILE) -> Dict[str, Dict]:
+    """读取各规划类型的求解器参数，文件不存在时返回空配置（使用Gurobi默认参数）"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('planning_types', {})
+
+
+def solver_params_fingerprint(params: Dict[str, Dict]) -> str:
+    """各规划类型求解器参数的摘要"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def save_solver_params(params: Dict[str, Dict], path: str = SOLVER_PARAMS_FILE, **metadata) -> None:
+    """保存各规划类型的求解器参数"""
+    data = dict(metadata)
+    data['planning_types'] = params
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
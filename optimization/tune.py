@@ -0,0 +1,282 @@
+"""
+求解器参数调优工具
+
+对一组有代表性的用户需求，在不同Gurobi参数组合下求解，按规划类型选出平均求解时间最短的组合，
+写入 solver_params.json，CourseScheduler 启动时自动加载。
+
+用法（在项目根目录下运行）：
+    python -m optimization.tune --repeats 2
+    python -m optimization.tune --max-configs 20 --output solver_params.json
+    python -m optimization.tune --workers 4 --pool-size 2   # 按线上部署的并发度限制求解线程
+    python -m optimization.tune --symmetry-benchmark --copies 0 2 4   # 对称性破除效果评估
+"""
+import argparse
+import dataclasses
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import gurobipy as gp
+
+from models.user import PLANNING_TYPES, UserRequirements
+from optimization.env_pool import available_cpus, create_env, threads_per_solve
+from optimization.scheduler import CourseScheduler
+from optimization.solver_params import SOLVER_PARAMS_FILE, save_solver_params
+from utils.constraints import CourseConstraints
+from utils.data_loader import CourseDataLoader
+from utils.graduation_requirements import CompiledProgram, DEFAULT_PROGRAM, default_registry
+
+# 大一下学期开学时的已修课程
+FIRST_YEAR_COMPLETED = ["经济学", "光华第一课", "组织与管理", "高等数学", "线性代数", "管理科学"]
+# 大二结束时的已修课程
+SECOND_YEAR_COMPLETED = FIRST_YEAR_COMPLETED + [
+    "高等数学（二）", "概率统计", "社会心理学", "科学思维与实践论", "微观经济学",
+    "公司金融", "宏观经济学", "营销学", "会计学", "计量经济学", "证券投资学", "金融市场与金融机构"
+]
+
+# 代表性用户画像（规划类型在调参时逐一替换）
+REPRESENTATIVE_PROFILES: List[Dict] = [
+    dict(is_freshman=True, current_grade=None, current_semester=None, completed_courses=[],
+         study_abroad=False, internship=False, preferred_subjects=[], upperbound_credits=20),
+    dict(is_freshman=True, current_grade=None, current_semester=None, completed_courses=[],
+         study_abroad=True, internship=True, internship_semester=6,
+         preferred_subjects=["量化金融与金融工程", "投资与资产管理"], upperbound_credits=16),
+    dict(is_freshman=False, current_grade=1, current_semester=1, completed_courses=FIRST_YEAR_COMPLETED,
+         study_abroad=False, internship=True, internship_semester=5,
+         preferred_subjects=["财务分析"], upperbound_credits=18),
+    dict(is_freshman=False, current_grade=2, current_semester=2, completed_courses=SECOND_YEAR_COMPLETED,
+         study_abroad=True, internship=False,
+         preferred_subjects=["宏观金融与经济政策", "金融经济学", "中国经济社会研究"], upperbound_credits=14),
+]
+
+# 参数搜索空间（Threads 另按线上每个求解可用的线程数生成）
+PARAM_GRID: Dict[str, List] = {
+    'MIPFocus': [0, 1, 2, 3],
+    'Presolve': [-1, 1, 2],
+    'Heuristics': [0.05, 0.2],
+}
+
+
+def candidate_configs(max_threads: int, max_configs: Optional[int] = None,
+                      seed: Optional[int] = None) -> List[Dict]:
+    """
+    生成参数组合；第一个始终为Gurobi默认参数，超出 max_configs 时随机抽样
+
+    Threads 的取值不超过 max_threads（线上每个求解可用的线程数），避免选出线上无法兑现的并行度。
+    """
+    grid = dict(PARAM_GRID, Threads=sorted({1, min(4, max_threads), max_threads}))
+    names = list(grid)
+    configs = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    if max_configs is not None and len(configs) > max_configs - 1:
+        configs = random.Random(seed).sample(configs, max(0, max_configs - 1))
+    return [{}] + configs
+
+
+def build_requirements(profile: Dict, planning_type: str) -> UserRequirements:
+    """按规划类型生成用户需求"""
+    user_requirements = UserRequirements(**profile, planning_type=planning_type)
+    if planning_type == "Balanced Workload":
+        user_requirements.target_credits_per_semester = min(12, user_requirements.upperbound_credits)
+    return user_requirements
+
+
+def run_profile(env: gp.Env, data_loader: CourseDataLoader,
+                user_requirements: UserRequirements, params: Dict,
+                program: Optional[CompiledProgram] = None, symmetry_breaking: bool = False) -> Optional[float]:
+    """求解一个用户画像，返回求解时间（秒）；未求得最优解时返回None"""
+    scheduler = CourseScheduler(user_requirements, data_loader, CourseConstraints(user_requirements),
+                                program=program, env=env, symmetry_breaking=symmetry_breaking,
+                                solver_params=params)
+    try:
+        scheduler.solve(quiet=True)
+        return scheduler.model.Runtime
+    except Exception:
+        return None
+    finally:
+        scheduler.dispose()
+
+
+def evaluate(env: gp.Env, data_loader: CourseDataLoader, profiles: List[UserRequirements],
+             params: Dict, repeats: int) -> Optional[float]:
+    """参数组合在全部画像上的平均求解时间；任一画像未求得最优解时返回None"""
+    runtimes = []
+    for user_requirements in profiles:
+        for _ in range(repeats):
+            runtime = run_profile(env, data_loader, user_requirements, params)
+            if runtime is None:
+                return None
+            runtimes.append(runtime)
+    return statistics.mean(runtimes)
+
+
+def tune(data_loader: CourseDataLoader, configs: List[Dict], threads: int, repeats: int = 1,
+         time_limit: Optional[float] = None) -> Dict[str, Dict]:
+    """
+    对每个规划类型评估所有参数组合，返回 {规划类型: {'params', 'mean_runtime', 'default_runtime'}}
+
+    configs[0] 视为默认参数，作为对照基准；所有参数组合均未求得最优解的规划类型不在结果中。
+    """
+    env = create_env(threads, output_flag=0)
+
+    results = {}
+    try:
+        for planning_type in PLANNING_TYPES:
+            profiles = [build_requirements(p, planning_type) for p in REPRESENTATIVE_PROFILES]
+            best_params, best_runtime, default_runtime = None, float('inf'), None
+            for index, params in enumerate(configs):
+                run_params = dict(params, TimeLimit=time_limit) if time_limit is not None else params
+                mean_runtime = evaluate(env, data_loader, profiles, run_params, repeats)
+                if mean_runtime is None:
+                    print(f"[{planning_type}] {params}: 未求得最优解，淘汰")
+                    continue
+                print(f"[{planning_type}] {params or '默认参数'}: {mean_runtime:.4f}s")
+                if index == 0:
+                    default_runtime = mean_runtime
+                if mean_runtime < best_runtime:
+                    best_params, best_runtime = params, mean_runtime
+
+            if best_params is not None:
+                results[planning_type] = {
+                    'params': best_params,
+                    'mean_runtime': best_runtime,
+                    'default_runtime': default_runtime,
+                }
+    finally:
+        env.dispose()
+    return results
+
+
+def enlarged_catalog(copies: int, source: str = 'all_courses.json') -> Tuple[CourseDataLoader, CompiledProgram]:
+    """
+    构造放大的合成课程目录
+
+    每门可互换候选选修课（非必修、非新生指定、不是其他课程的先修课）复制 copies 份，
+    副本沿用原课程的学分、上课时间、开课学期、先修课程和培养方案类别，只改ID和课程名。
+    """
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    source_loader = CourseDataLoader(source)
+    program = default_registry.get(DEFAULT_PROGRAM)
+    fixed = set(program.required_courses) | set(program.first_semester_courses)
+    prerequisites = {p for course in source_loader.get_all_courses() for p in course.prerequisites}
+
+    clones: Dict[str, List[str]] = {}  # 原课程名 -> 副本课程名
+    next_id = max(item['id'] for item in data) + 1
+    enlarged = list(data)
+    for item in data:
+        name = item['课程名']
+        if name in fixed or name in prerequisites:
+            continue
+        for k in range(1, copies + 1):
+            clone_name = f"{name}（副本{k}）"
+            enlarged.append(dict(item, id=next_id, 课程名=clone_name))
+            clones.setdefault(name, []).append(clone_name)
+            next_id += 1
+
+    fd, path = tempfile.mkstemp(suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(enlarged, f, ensure_ascii=False)
+        data_loader = CourseDataLoader(path)
+    finally:
+        os.remove(path)
+
+    enlarged_program = dataclasses.replace(program, credit_categories=[
+        dataclasses.replace(c, courses=c.courses | {n for name in c.courses for n in clones.get(name, [])})
+        for c in program.credit_categories
+    ])
+    return data_loader, CompiledProgram.compile(enlarged_program, data_loader)
+
+
+def symmetry_benchmark(env: gp.Env, copies_list: List[int], repeats: int = 1,
+                       time_limit: Optional[float] = None) -> List[Dict]:
+    """在不同规模的合成课程目录上对比开启/关闭对称性破除的平均求解时间"""
+    params = {'TimeLimit': time_limit} if time_limit is not None else {}  # 使用Gurobi默认参数
+    rows = []
+    for copies in copies_list:
+        data_loader, program = enlarged_catalog(copies)
+        for planning_type in PLANNING_TYPES:
+            row = {'copies': copies, 'courses': len(data_loader.courses), 'planning_type': planning_type}
+            for symmetry_breaking in (False, True):
+                runtimes = []
+                for profile in REPRESENTATIVE_PROFILES:
+                    user_requirements = build_requirements(profile, planning_type)
+                    for _ in range(repeats):
+                        runtimes.append(run_profile(env, data_loader, user_requirements, params,
+                                                    program, symmetry_breaking))
+                key = 'with_symmetry_breaking' if symmetry_breaking else 'without_symmetry_breaking'
+                # 任一次未求得最优解（含超时）时记为None
+                row[key] = None if None in runtimes else statistics.mean(runtimes)
+            without, with_ = row['without_symmetry_breaking'], row['with_symmetry_breaking']
+            print(f"[{copies} 份副本, {row['courses']} 门课程] {planning_type}: "
+                  f"关闭 {'未求得最优解' if without is None else f'{without:.4f}s'}，"
+                  f"开启 {'未求得最优解' if with_ is None else f'{with_:.4f}s'}")
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="求解器参数调优工具")
+    parser.add_argument('--output', default=SOLVER_PARAMS_FILE, help="输出的参数文件路径")
+    parser.add_argument('--repeats', type=int, default=1, help="每个画像重复求解次数")
+    parser.add_argument('--max-configs', type=int, default=None, help="最多评估的参数组合数（含默认参数）")
+    parser.add_argument('--time-limit', type=float, default=None, help="单次求解时间上限（秒）")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', 1)),
+                        help="线上 gunicorn 工作进程数，默认取 WEB_CONCURRENCY")
+    parser.add_argument('--pool-size', type=int,
+                        default=int(os.environ.get('SOLVER_ENV_POOL_SIZE',
+                                                   os.environ.get('GUNICORN_THREADS', 1))),
+                        help="线上每个工作进程的求解环境数，默认取 SOLVER_ENV_POOL_SIZE/GUNICORN_THREADS")
+    parser.add_argument('--symmetry-benchmark', action='store_true',
+                        help="只评估对称性破除的效果（不调参、不写参数文件）")
+    parser.add_argument('--copies', type=int, nargs='+', default=[0, 2, 4],
+                        help="对称性评估时每门候选选修课的副本数")
+    args = parser.parse_args()
+
+    # 与 env_pool.init_pool 相同的线程分配，SOLVER_THREADS 可覆盖
+    threads = int(os.environ.get('SOLVER_THREADS', 0)) or threads_per_solve(args.workers, args.pool_size)
+    print(f"每个求解使用 {threads} 个线程（{args.workers} 个工作进程 × {args.pool_size} 个并发求解）")
+
+    if args.symmetry_benchmark:
+        env = create_env(threads, output_flag=0)
+        try:
+            symmetry_benchmark(env, args.copies, args.repeats, args.time_limit)
+        finally:
+            env.dispose()
+        return
+
+    data_loader = CourseDataLoader('all_courses.json')
+    configs = candidate_configs(threads, args.max_configs, args.seed)
+    print(f"共 {len(configs)} 组参数，{len(REPRESENTATIVE_PROFILES)} 个用户画像")
+    results = tune(data_loader, configs, threads, args.repeats, args.time_limit)
+
+    save_solver_params(
+        {planning_type: r['params'] for planning_type, r in results.items()},
+        args.output,
+        generated=datetime.now().isoformat(),
+        gurobi_version='.'.join(map(str, gp.gurobi.version())),
+        cpus=available_cpus(),
+        threads_per_solve=threads,
+        benchmarks=results,
+    )
+    for planning_type, r in results.items():
+        print(f"{planning_type}: {r['params'] or '默认参数'} "
+              f"(平均 {r['mean_runtime']:.4f}s，默认参数 {r['default_runtime']}s)")
+    print(f"参数已写入 {args.output}")
+
+    missing = [planning_type for planning_type in PLANNING_TYPES if planning_type not in results]
+    if missing:
+        print(f"警告：以下规划类型没有可用的参数组合，将使用Gurobi默认参数：{', '.join(missing)}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
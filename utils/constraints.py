@@ -1,40 +1,231 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
 from models.course import Course
-from models.schedule import SemesterSchedule
+from models.schedule import SemesterSchedule, CompleteSchedule
 from models.user import UserRequirements
+from utils.graduation_requirements import CompiledProgram, default_registry
+
+SEMESTERS = range(1, 9)
+MIN_CREDITS_BEFORE_SENIOR = 9  # 前6个学期每学期最低学分
+MAX_CREDITS_SENIOR = 12  # 大四每学期最高学分
+
+
+class ScheduleValidator:
+    """
+    课表校验器
+
+    初始化时将课程目录和培养方案预计算为数组（学分、开课学期奇偶、时间冲突矩阵、
+    先修关系边表、类别掩码），之后用NumPy批量校验课表。
+    课表编码为长度为课程数的整数向量，取值为所在学期（1-8），0表示未选。
+    """
+
+    def __init__(self, data_loader, program: CompiledProgram):
+        self.program = program
+        self.courses: List[Course] = data_loader.get_all_courses()
+        self.index_of: Dict[int, int] = {course.id: i for i, course in enumerate(self.courses)}
+        self.normalized_names = [course.name.replace(' ', '') for course in self.courses]
+        n = len(self.courses)
+
+        self.semester_values = np.arange(SEMESTERS.start, SEMESTERS.stop, dtype=np.int8)
+        self.credits = np.array([course.credits for course in self.courses], dtype=np.int32)
+        # 只在一个学期开课的课程需与开课学期奇偶相同，-1表示不限
+        self.parity = np.array([course.semester[0] % 2 if len(course.semester) == 1 else -1
+                                for course in self.courses], dtype=np.int8)
+
+        self.conflicts = np.zeros((n, n), dtype=np.float32)
+        for i in range(n):
+            for j in range(i + 1, n):
+                if self.courses[i].has_time_conflict(self.courses[j]):
+                    self.conflicts[i, j] = self.conflicts[j, i] = 1
+
+        # 先修关系边表：prereq_course[k] 是 prereq_target[k] 的先修课程（目录外的先修课程忽略，与模型一致）
+        name_index = {course.name: i for i, course in enumerate(self.courses)}
+        edges = [(i, name_index[p]) for i, course in enumerate(self.courses)
+                 for p in course.prerequisites if p in name_index]
+        self.prereq_target = np.array([e[0] for e in edges], dtype=np.int64)
+        self.prereq_course = np.array([e[1] for e in edges], dtype=np.int64)
+
+        def mask_of(course_ids) -> np.ndarray:
+            mask = np.zeros(n, dtype=bool)
+            mask[[self.index_of[c] for c in course_ids if c in self.index_of]] = True
+            return mask
+
+        self.required = mask_of(program.required_ids)
+        self.first_semester = mask_of(program.first_semester_ids)
+        self.categories = {key: mask_of(ids) for key, ids in program.category_ids.items()}
+
+    def completed_mask(self, completed_courses: Sequence[str]) -> np.ndarray:
+        """已修课程掩码（忽略课程名中的空格）"""
+        normalized = {name.replace(' ', '') for name in completed_courses}
+        return np.array([name in normalized for name in self.normalized_names], dtype=bool)
+
+    def encode(self, schedule: CompleteSchedule) -> Tuple[np.ndarray, int, int]:
+        """
+        将课表编码为学期向量，同时返回 (被安排多次的课程数, 不在课程目录中的课程数)
+
+        学期向量无法表示重复和目录外的课程：重复课程只保留最后一次出现的学期，目录外课程忽略，
+        二者由返回的计数在校验时报告。
+        """
+        assignment = np.zeros(len(self.courses), dtype=np.int8)
+        occurrences = np.zeros(len(self.courses), dtype=np.int32)
+        unknown = 0
+        for semester, semester_schedule in schedule.schedules.items():
+            for course in semester_schedule.courses:
+                index = self.index_of.get(course.id)
+                if index is None:
+                    unknown += 1
+                    continue
+                assignment[index] = semester
+                occurrences[index] += 1
+        return assignment, int(np.count_nonzero(occurrences > 1)), unknown
+
+    def encode_batch(self, schedules: Sequence[CompleteSchedule]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """将多个课表编码为 (课表数, 课程数) 矩阵，以及各课表的重复课程数和目录外课程数"""
+        encoded = [self.encode(schedule) for schedule in schedules]
+        return (np.stack([e[0] for e in encoded]),
+                np.array([e[1] for e in encoded]),
+                np.array([e[2] for e in encoded]))
+
+    def validate_batch(self, assignments: np.ndarray, user_requirements: UserRequirements,
+                       duplicates: Optional[np.ndarray] = None,
+                       unknown: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        批量校验课表，返回 {检查项: 长度为课表数的布尔数组（True表示通过）}，
+        其中 'valid' 为全部检查项均通过；duplicates/unknown 为编码时得到的计数，未提供时视为0
+        """
+        u = user_requirements
+        assignments = np.atleast_2d(assignments)
+        taken = assignments > 0
+        completed = self.completed_mask(u.completed_courses)
+        first_semester = 9 - u.get_remaining_semesters()
+        planned = [s for s in SEMESTERS if s >= first_semester]
+        onehot = assignments[:, None, :] == self.semester_values[:, None]  # (课表数, 学期, 课程)
+        semester_credits = onehot.astype(np.int32) @ self.credits  # (课表数, 学期)
+
+        checks = {}
+        # 每门课程只安排一次，且都在课程目录中
+        checks['duplicate_courses'] = np.broadcast_to(duplicates if duplicates is not None else 0,
+                                                      len(assignments)) == 0
+        checks['unknown_courses'] = np.broadcast_to(unknown if unknown is not None else 0,
+                                                    len(assignments)) == 0
+        # 只在规划学期内选课，且不重复选已修课程
+        out_of_range = (assignments < first_semester) | (assignments > SEMESTERS[-1])
+        checks['planning_range'] = ~np.any(taken & (out_of_range | completed), axis=1)
+        # 同一学期内没有时间冲突
+        onehot_f = onehot.reshape(-1, len(self.courses)).astype(np.float32)
+        conflict_pairs = ((onehot_f @ self.conflicts) * onehot_f).sum(axis=1)
+        checks['time_conflicts'] = conflict_pairs.reshape(len(assignments), -1).sum(axis=1) == 0
+        # 开课学期奇偶
+        restricted = self.parity >= 0
+        checks['offering_semester'] = ~np.any(
+            taken & restricted & (assignments % 2 != self.parity), axis=1
+        )
+        # 先修课程已修或在更早的学期选修
+        if len(self.prereq_target):
+            target_semester = assignments[:, self.prereq_target]
+            prereq_semester = assignments[:, self.prereq_course]
+            satisfied = completed[self.prereq_course] | (
+                (prereq_semester > 0) & (prereq_semester < target_semester)
+            )
+            checks['prerequisites'] = ~np.any((target_semester > 0) & ~satisfied, axis=1)
+        else:
+            checks['prerequisites'] = np.ones(len(assignments), dtype=bool)
+        # 学期学分：不超过上限；前6学期不少于9学分；大四不超过12学分
+        planned_credits = semester_credits[:, [s - 1 for s in planned]]
+        ok = np.all(planned_credits <= u.upperbound_credits, axis=1)
+        early = [s - 1 for s in planned if s <= 6]
+        if early:
+            ok &= np.all(semester_credits[:, early] >= MIN_CREDITS_BEFORE_SENIOR, axis=1)
+        senior = [s - 1 for s in planned if s >= 7]
+        if senior:
+            ok &= np.all(semester_credits[:, senior] <= MAX_CREDITS_SENIOR, axis=1)
+        checks['semester_credits'] = ok
+        # 必修课程全部修读
+        remaining_required = self.required & ~completed
+        checks['required_courses'] = np.all(taken[:, remaining_required], axis=1)
+        # 各类别学分要求
+        ok = np.ones(len(assignments), dtype=bool)
+        for category in self.program.credit_categories:
+            mask = self.categories[category.key]
+            earned = (taken & mask).astype(np.int32) @ self.credits
+            ok &= earned + int(self.credits[mask & completed].sum()) >= category.credits_required
+        checks['category_credits'] = ok
+        # 不出国时必修课程在前6个学期完成
+        if not u.study_abroad and first_semester <= 6:
+            checks['study_abroad'] = ~np.any(remaining_required & (assignments > 6), axis=1)
+        else:
+            checks['study_abroad'] = np.ones(len(assignments), dtype=bool)
+        # 新生第一学期的指定课程
+        if u.is_freshman:
+            checks['first_semester'] = np.all(assignments[:, self.first_semester & ~completed] == 1, axis=1)
+        else:
+            checks['first_semester'] = np.ones(len(assignments), dtype=bool)
+
+        checks['valid'] = np.logical_and.reduce(list(checks.values()))
+        return checks
+
+    def validate(self, schedule: CompleteSchedule, user_requirements: UserRequirements) -> List[str]:
+        """校验单个课表，返回未通过的检查项（空列表表示通过）"""
+        assignment, duplicates, unknown = self.encode(schedule)
+        checks = self.validate_batch(assignment, user_requirements, duplicates, unknown)
+        return [name for name, passed in checks.items() if name != 'valid' and not passed[0]]
+
 
 class CourseConstraints:
     """课程约束条件"""
-    
-    def __init__(self, user_requirements: UserRequirements):
+
+    def __init__(self, user_requirements: UserRequirements,
+                 validator: Optional[ScheduleValidator] = None):
         self.user_requirements = user_requirements
-    
+        self.validator = validator  # 预计算的课表校验器，整体校验课表时需要
+
     def check_prerequisites(self, course: Course, completed_courses: List[str]) -> bool:
         """检查先修课程要求"""
         return all(prereq in completed_courses for prereq in course.prerequisites)
-    
+
     def check_semester_load(self, schedule: SemesterSchedule, max_credits: int = 25) -> bool:
         """检查学期学分负载"""
         return schedule.get_total_credits() <= max_credits
-    
+
     def check_time_conflicts(self, schedule: SemesterSchedule) -> bool:
         """检查时间冲突"""
         return not schedule.has_conflicts()
-    
+
     def check_graduation_requirements(self, total_credits: int, required_credits: int = 140) -> bool:
         """检查毕业学分要求"""
         return total_credits >= required_credits
-    
-    def check_study_abroad_constraints(self, semester: int) -> bool:
-        """检查出国留学相关约束"""
-        if not self.user_requirements.study_abroad:
+
+    def check_study_abroad_constraints(self, schedule: CompleteSchedule) -> bool:
+        """检查出国留学相关约束：不出国时必修课程须在前6个学期完成"""
+        if self.user_requirements.study_abroad:
             return True
-        # 这里可以添加出国留学相关的具体约束
-        return True
-    
-    def check_internship_constraints(self, semester: int) -> bool:
-        """检查实习相关约束"""
-        if not self.user_requirements.internship:
+        if self.validator is None:
+            # 未提供校验器时逐门比对必修课程名
+            required = default_registry.get(self.user_requirements.program).required_courses
+            return not any(course.name in required
+                           for semester, semester_schedule in schedule.schedules.items() if semester > 6
+                           for course in semester_schedule.courses)
+        return 'study_abroad' not in self.validate_schedule(schedule)
+
+    def check_internship_constraints(self, schedule: CompleteSchedule) -> bool:
+        """
+        检查实习相关约束：实习学期须在1-8学期内，且若在规划范围内，该学期学分不超过上限
+        （减少实习学期课程数是优化目标而非硬约束，此处不检查）
+        """
+        if not self.user_requirements.internship or self.user_requirements.internship_semester is None:
+            return True
+        semester = self.user_requirements.internship_semester
+        if semester not in SEMESTERS:
+            return False
+        if semester not in schedule.schedules:
             return True
-        # 这里可以添加实习相关的具体约束
-        return True 
\ No newline at end of file
+        return schedule.schedules[semester].get_total_credits() <= self.user_requirements.upperbound_credits
+
+    def validate_schedule(self, schedule: CompleteSchedule) -> List[str]:
+        """校验完整课表（冲突、先修、开课学期、学期学分、毕业要求），返回未通过的检查项"""
+        if self.validator is None:
+            raise ValueError("校验完整课表需要提供 ScheduleValidator")
+        violations = self.validator.validate(schedule, self.user_requirements)
+        if not self.check_internship_constraints(schedule):
+            violations.append('internship')
+        return violations
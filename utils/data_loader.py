@@ -1,3 +1,4 @@
+import hashlib
 import json
 from typing import List, Dict
 from models.course import Course
@@ -18,6 +19,11 @@ class CourseDataLoader:
                 course = Course.from_dict(course_data)
                 self.courses[course.name] = course
     
+    def catalog_hash(self) -> str:
+        """课程数据文件的SHA-256摘要，用于校验离线预计算结果是否与当前课程目录一致"""
+        with open(self.json_file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    
     def get_course(self, course_name: str) -> Course:
         """获取指定课程"""
         return self.courses.get(course_name)
@@ -1,58 +1,201 @@
-from typing import List, Dict, Set
+import json
+import os
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import List, Dict, Set, Tuple, Optional
+
+# 培养方案数据文件目录（每个专业/年级一个JSON文件）
+PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'programs')
+DEFAULT_PROGRAM = 'finance'
+
+
+@dataclass
+class CreditCategory:
+    """需修满一定学分的课程类别"""
+    key: str  # 类别标识
+    name: str  # 类别名称
+    credits_required: int  # 所需学分
+    courses: Set[str]  # 该类别包含的课程名
+
+
+@dataclass
+class GraduationProgram:
+    """培养方案（从数据文件加载）"""
+    id: str  # 方案标识，对应文件名
+    name: str  # 方案名称
+    major: str  # 专业
+    cohort: Optional[int]  # 适用年级，None表示不限
+    required_courses: Set[str]  # 必修课程
+    credit_categories: List[CreditCategory]  # 学分类别要求
+    first_semester_courses: List[str] = field(default_factory=list)  # 新生第一学期必修课程
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GraduationProgram':
+        """从字典创建培养方案"""
+        return cls(
+            id=data['id'],
+            name=data.get('name', data['id']),
+            major=data.get('major', ''),
+            cohort=data.get('cohort'),
+            required_courses=set(data['required_courses']),
+            credit_categories=[
+                CreditCategory(
+                    key=c['key'],
+                    name=c.get('name', c['key']),
+                    credits_required=c['credits_required'],
+                    courses=set(c['courses'])
+                )
+                for c in data.get('credit_categories', [])
+            ],
+            first_semester_courses=data.get('first_semester_courses', [])
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'GraduationProgram':
+        """从JSON文件加载培养方案"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def get_course_category(self, course_name: str) -> str:
+        """获取课程所属类别"""
+        if course_name in self.required_courses:
+            return "required"
+        for category in self.credit_categories:
+            if course_name in category.courses:
+                return category.key
+        return "unknown"
+
+
+@dataclass
+class CompiledProgram:
+    """
+    针对某一课程目录编译后的培养方案
+
+    课程集合被转换为排好序的课程ID元组（稀疏索引），建模时直接使用，无需逐个比对课程名。
+    """
+    program: GraduationProgram
+    required_ids: Tuple[int, ...]
+    first_semester_ids: Tuple[int, ...]
+    category_ids: Dict[str, Tuple[int, ...]]
+    category_credits: Dict[str, Dict[str, int]]  # 各类别内课程名（去空格）到学分
+
+    @property
+    def credit_categories(self) -> List[CreditCategory]:
+        return self.program.credit_categories
+
+    @classmethod
+    def compile(cls, program: GraduationProgram, data_loader) -> 'CompiledProgram':
+        """根据课程目录编译培养方案"""
+        courses = data_loader.get_all_courses()
+        name_to_id = {course.name: course.id for course in courses}
+
+        def ids_of(names) -> Tuple[int, ...]:
+            return tuple(sorted(name_to_id[name] for name in names if name in name_to_id))
+
+        return cls(
+            program=program,
+            required_ids=ids_of(program.required_courses),
+            first_semester_ids=tuple(name_to_id[name] for name in program.first_semester_courses
+                                     if name in name_to_id),
+            category_ids={c.key: ids_of(c.courses) for c in program.credit_categories},
+            category_credits={
+                c.key: {course.name.replace(' ', ''): course.credits
+                        for course in courses if course.name in c.courses}
+                for c in program.credit_categories
+            }
+        )
+
+    def completed_credits(self, category_key: str, completed_courses: List[str]) -> int:
+        """计算已修课程中属于某类别的学分"""
+        credits = self.category_credits[category_key]
+        normalized_completed = {name.replace(' ', '') for name in completed_courses}
+        return sum(credits.get(name, 0) for name in normalized_completed)
+
+
+class ProgramRegistry:
+    """培养方案注册表：启动时加载全部方案，按课程目录缓存编译结果"""
+
+    def __init__(self, programs_dir: str = PROGRAMS_DIR):
+        self.programs: Dict[str, GraduationProgram] = {}
+        for file_name in sorted(os.listdir(programs_dir)):
+            if file_name.endswith('.json'):
+                program = GraduationProgram.load(os.path.join(programs_dir, file_name))
+                self.programs[program.id] = program
+        self._compiled = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __contains__(self, program_id: str) -> bool:
+        return program_id in self.programs
+
+    def get(self, program_id: Optional[str] = None) -> GraduationProgram:
+        """获取培养方案，未指定时返回默认方案"""
+        return self.programs[program_id or DEFAULT_PROGRAM]
+
+    def resolve(self, program_id: Optional[str] = None, major: Optional[str] = None,
+                cohort: Optional[int] = None) -> Optional[str]:
+        """
+        确定适用的培养方案标识
+
+        指定 program_id 时直接使用；否则按专业和年级查找：在该专业的方案中选取
+        适用年级不晚于 cohort 的最新方案（cohort 为空的方案适用于所有年级）。
+        都未指定时返回默认方案，找不到时返回None。
+        """
+        if program_id:
+            return program_id if program_id in self.programs else None
+        if not major:
+            return DEFAULT_PROGRAM
+        candidates = [
+            p for p in self.programs.values()
+            if p.major == major and (p.cohort is None or cohort is None or p.cohort <= cohort)
+        ]
+        if not candidates:
+            return None
+        # 有明确年级的方案优先于通用方案，年级越新越优先
+        return max(candidates, key=lambda p: (p.cohort is not None, p.cohort or 0)).id
+
+    def compile(self, program_id: Optional[str], data_loader) -> CompiledProgram:
+        """获取针对该课程目录编译后的培养方案（首次调用时编译）"""
+        program_id = program_id or DEFAULT_PROGRAM
+        with self._lock:
+            compiled = self._compiled.setdefault(data_loader, {})
+            if program_id not in compiled:
+                compiled[program_id] = CompiledProgram.compile(self.programs[program_id], data_loader)
+            return compiled[program_id]
+
+    def compile_all(self, data_loader) -> None:
+        """预编译全部培养方案"""
+        for program_id in self.programs:
+            self.compile(program_id, data_loader)
+
+
+default_registry = ProgramRegistry()
+_default_program = default_registry.get()
+
 
 class GraduationRequirements:
-    """毕业要求定义"""
-    
+    """毕业要求定义（默认培养方案，兼容旧接口）"""
+
     # 必修课程列表
-    REQUIRED_COURSES: Set[str] = {
-        "高等数学", "高等数学（二）", "经济学", "光华第一课", "概率统计",
-        "科学思维与实践论", "线性代数", "组织与管理", "微观经济学", "会计学",
-        "宏观经济学", "计量经济学", "社会心理学", "营销学", "公司金融",
-        "管理科学", "数据科学的Python基础", "证券投资学", "金融市场与金融机构"
-    }
-    
-    # 金融选修课程列表（需要选够12学分）
-    FINANCE_ELECTIVE_COURSES: Set[str] = {
-        "行为金融", "因果推断与商业应用", "金融建模与量化投资", "衍生品定价及应用",
-        "金融时间序列分析", "金融中的数学方法", "科技金融与数字金融", "固定收益证券",
-        "风险管理", "国际金融", "风险资本与创新融资", "公司估值"
-    }
-    
-    # 中国相关课程列表（需要选够4学分）
-    CHINA_RELATED_COURSES: Set[str] = {
-        "中国经济", "中国金融", "中国经济改革与发展", "中国社会（上）", "中国社会（下）"
-    }
-    
-    # 其他选修课程列表（需要选够8学分）
-    OTHER_ELECTIVE_COURSES: Set[str] = {
-        "创新管理", "综合商业计划书竞赛", "可持续创业", "共演战略：从创业到企业转型",
-        "人工智能与商业创新", "商战模拟", "人力资源管理", "企业伦理", "战略管理",
-        "创业管理", "创业与创新实践", "互联网与商业模式创新", "供应链管理",
-        "从案例学习管理", "创业思维", "影子中央银行", "物流与供应链管理",
-        "互联网时代营销新模式", "社会分层与流动", "智能网络与智能场景",
-        "国家账本", "随机分析与应用", "中国公司—会计视角", "社会主义政治经济学",
-        "生产作业管理", "投资银行", "中国社会与商业文化", "人口经济学",
-        "体育营销", "传统国学中的管理思想", "真实世界经济学：田野调查",
-        "大样本统计理论", "当代量化交易系统的原理与实现", "中国商务",
-        "价值投资", "定量推理法", "期权波动率和对冲基金","公共治理专题：研究设计与方法",
-        "数据驱动模型与运营分析","深度学习与文本分析" 
-    }
-    
+    REQUIRED_COURSES: Set[str] = _default_program.required_courses
+
+    _categories = {c.key: c for c in _default_program.credit_categories}
+
+    # 金融选修课程列表
+    FINANCE_ELECTIVE_COURSES: Set[str] = _categories['finance_elective'].courses
+
+    # 中国相关课程列表
+    CHINA_RELATED_COURSES: Set[str] = _categories['china_related'].courses
+
+    # 其他选修课程列表
+    OTHER_ELECTIVE_COURSES: Set[str] = _categories['other_elective'].courses
+
     # 各类别所需学分
-    FINANCE_ELECTIVE_CREDITS_REQUIRED = 12
-    CHINA_RELATED_CREDITS_REQUIRED = 4
-    OTHER_ELECTIVE_CREDITS_REQUIRED = 8
-    
+    FINANCE_ELECTIVE_CREDITS_REQUIRED = _categories['finance_elective'].credits_required
+    CHINA_RELATED_CREDITS_REQUIRED = _categories['china_related'].credits_required
+    OTHER_ELECTIVE_CREDITS_REQUIRED = _categories['other_elective'].credits_required
+
     @classmethod
     def get_course_category(cls, course_name: str) -> str:
         """获取课程所属类别"""
-        if course_name in cls.REQUIRED_COURSES:
-            return "required"
-        elif course_name in cls.FINANCE_ELECTIVE_COURSES:
-            return "finance_elective"
-        elif course_name in cls.CHINA_RELATED_COURSES:
-            return "china_related"
-        elif course_name in cls.OTHER_ELECTIVE_COURSES:
-            return "other_elective"
-        else:
-            return "unknown" 
\ No newline at end of file
+        return _default_program.get_course_category(course_name)
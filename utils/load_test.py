@@ -0,0 +1,219 @@
+"""
+/recommend 接口压测工具
+
+从 logs/app.log* 中提取真实请求（或按 UserRequirements 的取值分布生成合成请求），
+以指定并发数和到达速率回放到本地 webapi，输出延迟分位数、吞吐量和错误率。
+
+用法（在项目根目录下运行）：
+    python -m utils.load_test --source logs --concurrency 8 --rate 5 --requests 200
+    python -m utils.load_test --source synthetic --requests 500 --rate 0
+
+配合服务端 STUB_SOLVER=1 启动 webapi，可只测量Web与建模开销、剥离求解器耗时。
+"""
+import argparse
+import ast
+import glob
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from models.user import PLANNING_TYPES, SUBJECTS
+from utils.data_loader import CourseDataLoader
+
+REQUEST_LOG_PATTERN = re.compile(r'Received request data: (\{.*\}) \[in ')
+
+
+def _decode_line(raw: bytes) -> str:
+    """日志可能来自不同平台（UTF-8 / GBK），逐行解码"""
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode('utf-8', errors='replace')
+
+
+def extract_payloads(log_pattern: str = 'logs/app.log*') -> List[Dict]:
+    """从日志中提取所有 /recommend 请求体"""
+    payloads = []
+    for path in sorted(glob.glob(log_pattern)):
+        with open(path, 'rb') as f:
+            for raw in f:
+                match = REQUEST_LOG_PATTERN.search(_decode_line(raw))
+                if not match:
+                    continue
+                try:
+                    payload = ast.literal_eval(match.group(1))
+                except (ValueError, SyntaxError):
+                    continue
+                if isinstance(payload, dict):
+                    payloads.append(payload)
+    return payloads
+
+
+def generate_payloads(data_loader: CourseDataLoader, count: int, seed: Optional[int] = None) -> List[Dict]:
+    """按 UserRequirements 的取值范围生成合成请求"""
+    rng = random.Random(seed)
+    courses = data_loader.get_all_courses()
+    payloads = []
+    for _ in range(count):
+        is_freshman = rng.random() < 0.3
+        current_grade = None if is_freshman else rng.randint(1, 3)
+        current_semester = None if is_freshman else rng.randint(1, 2)
+
+        # 逐学期模拟已修课程：只选开课学期匹配且先修课程已完成的课程
+        completed = []
+        finished_semesters = 0 if is_freshman else (current_grade - 1) * 2 + current_semester
+        if not is_freshman:
+            for semester in range(1, finished_semesters + 1):
+                candidates = [
+                    c for c in courses
+                    if c.name not in completed
+                    and any(s % 2 == semester % 2 for s in c.semester)
+                    and all(p in completed for p in c.prerequisites)
+                ]
+                rng.shuffle(candidates)
+                completed.extend(c.name for c in candidates[:rng.randint(3, 5)])
+
+        # 实习学期只从尚未开始的学期中选取，目标学分不超过学分上限，保证请求本身合法
+        internship = rng.random() < 0.4
+        planning_type = rng.choice(PLANNING_TYPES)
+        upperbound_credits = rng.randint(12, 20)
+        payloads.append({
+            'is_freshman': is_freshman,
+            'current_grade': current_grade,
+            'current_semester': current_semester,
+            'completed_courses': completed,
+            'study_abroad': rng.random() < 0.3,
+            'internship': internship,
+            'internship_semester': rng.randint(finished_semesters + 1, 8) if internship else None,
+            'planning_type': planning_type,
+            'target_credits_per_semester': (rng.randint(9, upperbound_credits)
+                                            if planning_type == "Balanced Workload" else None),
+            'preferred_subjects': rng.sample(SUBJECTS, rng.randint(0, 3)),
+            'upperbound_credits': upperbound_credits,
+        })
+    return payloads
+
+
+def _send(url: str, payload: Dict, timeout: float, start: Optional[float] = None) -> Dict:
+    """
+    发送单个请求并记录延迟和状态码
+
+    start 为该请求的计划到达时间；开环模式下从该时刻起计时，
+    使请求在客户端排队等待的时间也计入延迟（避免协调遗漏）
+    """
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    if start is None:
+        start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None  # 连接失败或超时
+    return {'latency': time.perf_counter() - start, 'status': status}
+
+
+def run_load_test(url: str, payloads: List[Dict], concurrency: int, rate: float,
+                  total: int, timeout: float = 60.0, seed: Optional[int] = None) -> List[Dict]:
+    """
+    回放请求。rate > 0 时按泊松过程（开环）发送，rate <= 0 时各线程尽快发送（闭环）。
+
+    开环模式下延迟从计划到达时间算起：并发线程全部占满时，请求在队列中等待的时间
+    同样计入延迟，服务端饱和时的 p95/p99 不会被低估。
+    """
+    rng = random.Random(seed)
+    results = []
+    lock = threading.Lock()
+
+    def task(payload, scheduled_at):
+        result = _send(url, payload, timeout, scheduled_at)
+        with lock:
+            results.append(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        next_arrival = time.perf_counter()
+        for i in range(total):
+            scheduled_at = None
+            if rate > 0:
+                next_arrival += rng.expovariate(rate)
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                scheduled_at = next_arrival
+            executor.submit(task, payloads[i % len(payloads)], scheduled_at)
+    return results
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩法计算分位数"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    """汇总延迟分位数、吞吐量和错误率"""
+    latencies = [r['latency'] for r in results]
+    errors = [r for r in results if r['status'] != 200]
+    status_counts: Dict[str, int] = {}
+    for r in results:
+        key = str(r['status'])
+        status_counts[key] = status_counts.get(key, 0) + 1
+    return {
+        'requests': len(results),
+        'elapsed_s': elapsed,
+        'throughput_rps': len(results) / elapsed if elapsed > 0 else 0.0,
+        'error_rate': len(errors) / len(results) if results else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000 if latencies else float('nan'),
+        'status_counts': status_counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/recommend 接口压测工具")
+    parser.add_argument('--url', default='http://127.0.0.1:5000/recommend')
+    parser.add_argument('--source', choices=['logs', 'synthetic'], default='logs',
+                        help="请求来源：日志回放或合成请求")
+    parser.add_argument('--logs', default='logs/app.log*', help="日志文件通配路径")
+    parser.add_argument('--requests', type=int, default=100, help="总请求数")
+    parser.add_argument('--concurrency', type=int, default=4, help="并发数")
+    parser.add_argument('--rate', type=float, default=0.0, help="平均到达速率（请求/秒），0 表示尽快发送")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.source == 'logs':
+        payloads = extract_payloads(args.logs)
+    else:
+        payloads = generate_payloads(CourseDataLoader('all_courses.json'), args.requests, args.seed)
+    if not payloads:
+        print("没有可用的请求数据")
+        return
+    print(f"共 {len(payloads)} 条请求样本，开始压测 {args.url} ...")
+
+    start = time.perf_counter()
+    results = run_load_test(args.url, payloads, args.concurrency, args.rate,
+                            args.requests, args.timeout, args.seed)
+    report = summarize(results, time.perf_counter() - start)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块，RSS 统计记为0
+    resource = None
+
+
+# 是否允许统计Python堆；多线程处理请求的进程中应调用 disable_heap_tracing 关闭
+_heap_tracing_allowed = True
+
+
+def disable_heap_tracing() -> bool:
+    """关闭当前进程的Python堆统计，返回此前是否已在统计"""
+    global _heap_tracing_allowed
+    _heap_tracing_allowed = False
+    was_tracing = tracemalloc.is_tracing()
+    if was_tracing:
+        tracemalloc.stop()
+    return was_tracing
+
+
+def current_rss_bytes() -> int:
+    """当前进程常驻内存（RSS）；非Linux平台退化为历史峰值"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """进程生命周期内的RSS峰值"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux单位为KB
+
+
+class MemoryTracker:
+    """
+    单次请求的内存统计
+
+    按阶段记录耗时、RSS变化和该阶段内进程RSS峰值的抬升量（peak_rss_growth_mb，
+    阶段内RSS未超过此前峰值时为0）；trace_python_heap 为True时同时用 tracemalloc
+    统计各阶段的Python堆增长和峰值（有一定开销，默认关闭）。
+
+    tracemalloc 在进程内首次使用时启动、之后不再停止，但其峰值是进程级的，
+    多个线程同时处于某一阶段时统计会互相干扰，因此调用过 disable_heap_tracing 的进程中不统计。
+    """
+
+    def __init__(self, trace_python_heap: bool = False):
+        self.trace_python_heap = trace_python_heap and _heap_tracing_allowed
+        self.phases: Dict[str, Dict] = {}
+        if trace_python_heap and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.trace_python_heap:
+            tracemalloc.reset_peak()
+            heap_before = tracemalloc.get_traced_memory()[0]
+        rss_before = current_rss_bytes()
+        peak_before = peak_rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = {
+                'seconds': time.perf_counter() - start,
+                'rss_before_mb': rss_before / 2 ** 20,
+                'rss_after_mb': current_rss_bytes() / 2 ** 20,
+                'peak_rss_growth_mb': (peak_rss_bytes() - peak_before) / 2 ** 20,
+            }
+            if self.trace_python_heap:
+                heap_after, heap_peak = tracemalloc.get_traced_memory()
+                stats['py_heap_growth_mb'] = (heap_after - heap_before) / 2 ** 20
+                stats['py_heap_peak_mb'] = (heap_peak - heap_before) / 2 ** 20
+            self.phases[name] = stats
+
+    def to_dict(self) -> Dict:
+        # 当前RSS和峰值来自不同数据源（/proc 与 getrusage），峰值至少取当前值
+        rss = current_rss_bytes()
+        return {
+            'phases': self.phases,
+            'rss_mb': rss / 2 ** 20,
+            'peak_rss_mb': max(rss, peak_rss_bytes()) / 2 ** 20,
+            'pid': os.getpid(),
+        }
@@ -0,0 +1,259 @@
+"""
+新生课表离线预计算表
+
+新生没有已修课程，输入空间有限：规划类型 × 学分上限(9-20) × 是否出国 × 实习学期
+× 每学期目标学分（仅适度均衡） × 至多3个偏好学科。离线并行求解整个空间，
+结果连同课程目录、培养方案、模型版本和求解器参数的摘要存为压缩文件，webapi 对匹配的新生请求直接查表返回。
+
+构建（在项目根目录下运行）：
+    python -m utils.plan_table --workers 8
+    python -m utils.plan_table --limit 100 --output /tmp/plan_table.json.gz   # 冒烟测试
+"""
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import os
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models.schedule import CompleteSchedule, SemesterSchedule
+from models.user import PLANNING_TYPES, SUBJECTS, UserRequirements
+from utils.data_loader import CourseDataLoader
+from utils.graduation_requirements import DEFAULT_PROGRAM, GraduationProgram, default_registry
+
+FORMAT_VERSION = 1
+
+PLAN_TABLE_FILE = os.environ.get(
+    'PLAN_TABLE_FILE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'plan_table.json.gz')
+)
+
+CREDIT_RANGE = range(9, 21)  # 学分上限与目标学分的取值范围
+INTERNSHIP_SEMESTERS = [None] + list(range(1, 9))  # None 表示不实习
+SEMESTERS = range(1, 9)
+
+# 偏好学科组合（0-3个，组合内按 SUBJECTS 顺序排列）
+SUBJECT_COMBOS: List[Tuple[str, ...]] = [
+    combo for size in range(4) for combo in itertools.combinations(SUBJECTS, size)
+]
+_SUBJECT_COMBO_INDEX = {frozenset(combo): i for i, combo in enumerate(SUBJECT_COMBOS)}
+
+
+def _target_values(planning_type: str) -> List[Optional[int]]:
+    """只有适度均衡类型使用目标学分"""
+    return list(CREDIT_RANGE) if planning_type == "Balanced Workload" else [None]
+
+
+def _block_size(planning_type: str) -> int:
+    return (len(CREDIT_RANGE) * 2 * len(INTERNSHIP_SEMESTERS)
+            * len(_target_values(planning_type)) * len(SUBJECT_COMBOS))
+
+
+_BLOCK_OFFSETS = dict(zip(
+    PLANNING_TYPES,
+    itertools.accumulate([0] + [_block_size(t) for t in PLANNING_TYPES[:-1]])
+))
+TABLE_SIZE = sum(_block_size(t) for t in PLANNING_TYPES)
+
+
+def profile_position(planning_type: str, upperbound_credits: int, study_abroad: bool,
+                     internship_semester: Optional[int], target_credits: Optional[int],
+                     preferred_subjects) -> int:
+    """将新生画像按混合进制编码为表中位置"""
+    targets = _target_values(planning_type)
+    position = CREDIT_RANGE.index(upperbound_credits)
+    position = position * 2 + int(study_abroad)
+    position = position * len(INTERNSHIP_SEMESTERS) + INTERNSHIP_SEMESTERS.index(internship_semester)
+    position = position * len(targets) + targets.index(target_credits)
+    position = position * len(SUBJECT_COMBOS) + _SUBJECT_COMBO_INDEX[frozenset(preferred_subjects)]
+    return _BLOCK_OFFSETS[planning_type] + position
+
+
+def enumerate_profiles() -> Iterator[Tuple[int, Dict]]:
+    """按表中位置顺序枚举全部新生画像（UserRequirements 参数）"""
+    for planning_type in PLANNING_TYPES:
+        for upperbound, abroad, internship_semester, target, subjects in itertools.product(
+                CREDIT_RANGE, (False, True), INTERNSHIP_SEMESTERS,
+                _target_values(planning_type), SUBJECT_COMBOS):
+            yield profile_position(planning_type, upperbound, abroad, internship_semester, target, subjects), dict(
+                is_freshman=True, current_grade=None, current_semester=None, completed_courses=[],
+                study_abroad=abroad, internship=internship_semester is not None,
+                internship_semester=internship_semester, planning_type=planning_type,
+                target_credits_per_semester=target, preferred_subjects=list(subjects),
+                upperbound_credits=upperbound
+            )
+
+
+def program_fingerprint(program: GraduationProgram) -> str:
+    """培养方案内容摘要"""
+    content = {
+        'required_courses': sorted(program.required_courses),
+        'first_semester_courses': program.first_semester_courses,
+        'credit_categories': [
+            [c.key, c.credits_required, sorted(c.courses)] for c in program.credit_categories
+        ],
+    }
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class PlanTable:
+    """新生课表查找表"""
+
+    def __init__(self, data: Dict, data_loader: CourseDataLoader):
+        self.program = data['program']
+        self.plans: List[List[List[int]]] = data['plans']
+        self.index = array('i', data['index'])
+        self.courses_by_id = {course.id: course for course in data_loader.get_all_courses()}
+
+    @classmethod
+    def load(cls, path: str, data_loader: CourseDataLoader) -> Optional['PlanTable']:
+        """加载查找表；文件不存在或版本、课程目录、画像编码、培养方案、模型版本、求解器参数不一致时返回None"""
+        from optimization.scheduler import MODEL_VERSION, SOLVER_PARAMS
+        from optimization.solver_params import solver_params_fingerprint
+
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION:
+            return None
+        if data.get('catalog_hash') != data_loader.catalog_hash():
+            return None
+        # 位置编码依赖规划类型和学科的取值及顺序
+        if data.get('planning_types') != PLANNING_TYPES or data.get('subjects') != SUBJECTS:
+            return None
+        if data.get('model_version') != MODEL_VERSION:
+            return None
+        if data.get('solver_params_hash') != solver_params_fingerprint(SOLVER_PARAMS):
+            return None
+        program = data.get('program')
+        if program not in default_registry or \
+                data.get('program_hash') != program_fingerprint(default_registry.get(program)):
+            return None
+        if len(data.get('index', [])) != TABLE_SIZE:
+            return None
+        return cls(data, data_loader)
+
+    def lookup(self, user_requirements: UserRequirements) -> Optional[CompleteSchedule]:
+        """查找新生请求对应的课表；不在表内（非新生、取值超出范围、无解等）时返回None"""
+        u = user_requirements
+        if not u.is_freshman or u.completed_courses:
+            return None
+        if (u.program or DEFAULT_PROGRAM) != self.program:
+            return None
+        subjects = frozenset(u.preferred_subjects)
+        if u.planning_type not in PLANNING_TYPES or subjects not in _SUBJECT_COMBO_INDEX:
+            return None
+        if u.upperbound_credits not in CREDIT_RANGE:
+            return None
+        internship_semester = u.internship_semester if u.internship else None
+        target = u.target_credits_per_semester if u.planning_type == "Balanced Workload" else None
+        if internship_semester not in INTERNSHIP_SEMESTERS or target not in _target_values(u.planning_type):
+            return None
+
+        plan_id = self.index[profile_position(u.planning_type, u.upperbound_credits, u.study_abroad,
+                                              internship_semester, target, subjects)]
+        if plan_id < 0:
+            return None
+        return CompleteSchedule({
+            semester: SemesterSchedule(semester, [self.courses_by_id[c] for c in course_ids])
+            for semester, course_ids in zip(SEMESTERS, self.plans[plan_id])
+        })
+
+
+_worker_state: Dict = {}
+
+
+def _init_worker(threads: int) -> None:
+    """构建进程初始化：每个进程创建一个求解环境"""
+    from optimization.env_pool import create_env
+    _worker_state['env'] = create_env(threads, output_flag=0)
+    _worker_state['data_loader'] = CourseDataLoader('all_courses.json')
+
+
+def _solve_profile(item: Tuple[int, Dict, str]) -> Tuple[int, Optional[List[List[int]]]]:
+    """求解单个画像，返回 (位置, 各学期课程ID)；无解时课表为None"""
+    from optimization.scheduler import CourseScheduler
+    from utils.constraints import CourseConstraints
+
+    position, profile, program = item
+    user_requirements = UserRequirements(**profile, program=program)
+    scheduler = CourseScheduler(user_requirements, _worker_state['data_loader'],
+                                CourseConstraints(user_requirements), env=_worker_state['env'])
+    try:
+        schedule = scheduler.solve(quiet=True)
+    except Exception:
+        return position, None
+    finally:
+        scheduler.dispose()
+    return position, [sorted(c.id for c in schedule.schedules[s].courses) for s in SEMESTERS]
+
+
+def build(output: str, program: str = DEFAULT_PROGRAM, workers: Optional[int] = None,
+          limit: Optional[int] = None) -> Dict:
+    """并行求解全部新生画像并写出查找表，返回统计信息"""
+    from multiprocessing import Pool
+    from optimization.env_pool import available_cpus, threads_per_solve
+    from optimization.scheduler import MODEL_VERSION, SOLVER_PARAMS
+    from optimization.solver_params import solver_params_fingerprint
+
+    workers = workers or available_cpus()
+    data_loader = CourseDataLoader('all_courses.json')
+    items = [(position, profile, program) for position, profile in enumerate_profiles()]
+    if limit is not None:
+        items = items[:limit]
+
+    index = [-1] * TABLE_SIZE
+    plans: List[List[List[int]]] = []
+    plan_ids: Dict[str, int] = {}  # 相同课表只存一份
+    with Pool(workers, initializer=_init_worker, initargs=(threads_per_solve(1, workers),)) as pool:
+        for done, (position, plan) in enumerate(pool.imap_unordered(_solve_profile, items, chunksize=16), 1):
+            if plan is not None:
+                key = json.dumps(plan)
+                if key not in plan_ids:
+                    plan_ids[key] = len(plans)
+                    plans.append(plan)
+                index[position] = plan_ids[key]
+            if done % 1000 == 0:
+                print(f"已求解 {done}/{len(items)}")
+
+    data = {
+        'version': FORMAT_VERSION,
+        'created': datetime.now().isoformat(),
+        'catalog_hash': data_loader.catalog_hash(),
+        'planning_types': PLANNING_TYPES,
+        'subjects': SUBJECTS,
+        'program': program,
+        'program_hash': program_fingerprint(default_registry.get(program)),
+        'model_version': MODEL_VERSION,
+        'solver_params_hash': solver_params_fingerprint(SOLVER_PARAMS),
+        'plans': plans,
+        'index': index,
+    }
+    with gzip.open(output, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    return {
+        'profiles': len(items),
+        'solved': sum(1 for i in index if i >= 0),
+        'unique_plans': len(plans),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建新生课表离线预计算表")
+    parser.add_argument('--output', default=PLAN_TABLE_FILE)
+    parser.add_argument('--program', default=DEFAULT_PROGRAM, help="培养方案标识")
+    parser.add_argument('--workers', type=int, default=None, help="并行进程数，默认为CPU核数")
+    parser.add_argument('--limit', type=int, default=None, help="只求解前N个画像（用于测试）")
+    args = parser.parse_args()
+
+    print(f"共 {TABLE_SIZE} 个新生画像")
+    stats = build(args.output, args.program, args.workers, args.limit)
+    print(f"完成：{stats}，已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from models.schedule import CompleteSchedule
+
+# 模型规模与求解统计对应的Gurobi属性
+MODEL_SIZE_ATTRS = ['NumVars', 'NumBinVars', 'NumIntVars', 'NumConstrs', 'NumNZs', 'NumObj']
+SOLVER_STAT_ATTRS = ['Status', 'Runtime', 'SolCount', 'NodeCount', 'IterCount', 'ObjVal', 'MIPGap']
+
+
+def _read_attrs(model, names) -> Dict:
+    """读取模型属性，不可用的属性（如无解时的ObjVal）记为None"""
+    values = {}
+    for name in names:
+        try:
+            values[name] = model.getAttr(name)
+        except Exception:
+            values[name] = None
+    return values
+
+
+def profile_solve(scheduler, output_dir: Optional[str] = None,
+                  top: int = 40) -> Tuple[Optional[CompleteSchedule], Dict]:
+    """
+    对一次建模+求解过程做性能剖析
+
+    返回 (课表, 剖析结果)。剖析结果包含建模阶段的cProfile统计、求解器日志、
+    求解统计和模型规模；指定 output_dir 时同时写入该目录下以时间戳命名的子目录。
+    求解失败时剖析结果照常保存，异常记录在 'error' 字段后重新抛出。
+    """
+    bundle: Dict = {'timestamp': datetime.now().isoformat()}
+    bundle_dir = None
+    if output_dir:
+        bundle_dir = os.path.join(output_dir, datetime.now().strftime('%Y%m%d-%H%M%S-%f'))
+        os.makedirs(bundle_dir, exist_ok=True)
+
+    # 1. 建模阶段
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        scheduler.create_model()
+    finally:
+        profiler.disable()
+    bundle['create_model_seconds'] = time.perf_counter() - start
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+    bundle['create_model_profile'] = stream.getvalue()
+    if bundle_dir:
+        profiler.dump_stats(os.path.join(bundle_dir, 'create_model.prof'))
+
+    # 2. 求解阶段：将求解器日志写入文件后读回
+    if bundle_dir:
+        log_path = os.path.join(bundle_dir, 'solver.log')
+    else:
+        fd, log_path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+    scheduler.model.setParam('LogFile', log_path)
+
+    schedule = None
+    error = None
+    start = time.perf_counter()
+    try:
+        schedule = scheduler.solve()
+    except Exception as e:
+        error = e
+        bundle['error'] = str(e)
+    bundle['solve_seconds'] = time.perf_counter() - start
+
+    scheduler.model.setParam('LogFile', '')  # 关闭日志文件句柄
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+        bundle['solver_log'] = f.read()
+    if not bundle_dir:
+        os.remove(log_path)
+
+    bundle['model_size'] = _read_attrs(scheduler.model, MODEL_SIZE_ATTRS)
+    bundle['solver_stats'] = _read_attrs(scheduler.model, SOLVER_STAT_ATTRS)
+
+    if bundle_dir:
+        bundle['path'] = bundle_dir
+        with open(os.path.join(bundle_dir, 'bundle.json'), 'w', encoding='utf-8') as f:
+            json.dump(bundle, f, ensure_ascii=False, indent=2, default=str)
+
+    if error is not None:
+        raise error
+    return schedule, bundle
@@ -1,8 +1,14 @@
 from flask import Flask, request, jsonify
 from models.user import UserRequirements
 from utils.data_loader import CourseDataLoader
-from utils.constraints import CourseConstraints
-from optimization.scheduler import CourseScheduler
+from utils.constraints import CourseConstraints, ScheduleValidator
+from optimization.scheduler import CourseScheduler, SolveLimitError
+from utils.profiling import profile_solve
+from utils.graduation_requirements import default_registry
+from optimization.env_pool import get_pool as get_solver_pool
+from utils.plan_table import PlanTable, PLAN_TABLE_FILE
+from utils.memory import MemoryTracker, disable_heap_tracing
+import json
 from flask_cors import CORS
 import os
 import logging
@@ -25,6 +31,99 @@ app.logger.addHandler(file_handler)
 app.logger.setLevel(logging.INFO)
 app.logger.info('Course Adviser startup')
 
+# 课程目录与培养方案在进程启动时加载并预编译一次，各请求共享（只读）
+DATA_LOADER = CourseDataLoader('all_courses.json')
+PROGRAMS = default_registry
+PROGRAMS.compile_all(DATA_LOADER)
+app.logger.info(f"Loaded graduation programs: {sorted(PROGRAMS.programs)}")
+# 各培养方案的课表校验器，用于在返回预计算结果前进行校验
+VALIDATORS = {
+    program_id: ScheduleValidator(DATA_LOADER, PROGRAMS.compile(program_id, DATA_LOADER))
+    for program_id in PROGRAMS.programs
+}
+
+# 压测用桩求解模式：只建模不调用求解器，用于剥离Web与建模开销
+STUB_SOLVER = os.environ.get('STUB_SOLVER') == '1'
+if STUB_SOLVER:
+    app.logger.warning('STUB_SOLVER enabled: schedules are NOT solved')
+
+# 对称性破除约束：python -m optimization.tune --symmetry-benchmark 确认能缩短求解时间后再开启
+SYMMETRY_BREAKING = os.environ.get('SYMMETRY_BREAKING') == '1'
+
+# 新生课表离线预计算表（与当前课程目录、培养方案、模型版本、求解器参数不一致时不启用；
+# 桩求解模式下不查表，保证压测测到的是建模开销）
+PLAN_TABLE = None if STUB_SOLVER else PlanTable.load(PLAN_TABLE_FILE, DATA_LOADER)
+if PLAN_TABLE is not None:
+    app.logger.info(f"Loaded freshman plan table from {PLAN_TABLE_FILE}")
+
+# 按请求剖析：需 ENABLE_PROFILING=1，且请求带 X-Profile 头或 ?profile= 参数
+# 取值 inline 时剖析结果随响应返回，其余取值保存到 PROFILE_DIR 目录
+ENABLE_PROFILING = os.environ.get('ENABLE_PROFILING') == '1'
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+
+def get_profile_mode():
+    """解析本次请求的剖析模式：None / 'inline' / 'save'"""
+    if not ENABLE_PROFILING:
+        return None
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    if not flag or flag in ('0', 'false'):
+        return None
+    return 'inline' if flag == 'inline' else 'save'
+
+
+# 内存统计：TRACK_PYTHON_HEAP=1 时额外统计Python堆峰值（有开销）。
+# tracemalloc 的峰值是进程级的，gunicorn 多线程工作进程中由 post_worker_init 关闭
+TRACK_PYTHON_HEAP = os.environ.get('TRACK_PYTHON_HEAP') == '1'
+
+# 请求体大小上限（字节），超限时返回413；单次求解的时间和内存上限见 optimization.env_pool.init_pool
+MAX_REQUEST_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', 64 * 1024))
+
+
+def read_json_body():
+    """读取JSON请求体；超过 MAX_REQUEST_BYTES 时返回None（不依赖Content-Length，分块传输同样受限）"""
+    if request.content_length is not None and request.content_length > MAX_REQUEST_BYTES:
+        return None
+    body = request.stream.read(MAX_REQUEST_BYTES + 1)
+    if len(body) > MAX_REQUEST_BYTES:
+        return None
+    return json.loads(body)
+
+
+def log_request_metrics(tracker, source, status):
+    """记录单次请求的耗时与内存指标（JSON格式，便于采集）"""
+    metrics = tracker.to_dict()
+    metrics['source'] = source
+    metrics['status'] = status
+    app.logger.info(f"Request metrics: {json.dumps(metrics)}")
+
+
+def build_result(schedule, user_requirements):
+    """将课表转换为响应数据"""
+    result = {
+        'schedule': {},
+        'message': '',
+        'total_credits': schedule.get_total_credits()
+    }
+    
+    for semester, semester_schedule in schedule.schedules.items():
+        result['schedule'][semester] = {
+            'total_credits': semester_schedule.get_total_credits(),
+            'courses': [
+                {
+                    'name': c.name,
+                    'credits': c.credits,
+                    'subject_category': getattr(c, 'subject_category', []) or []
+                }
+                for c in semester_schedule.courses
+            ]
+        }
+    
+    if not user_requirements.study_abroad:
+        result['message'] = '注意：由于您选择不出国，请您记得在前三学期修完政治、体育、专业课以取得保研资格。'
+    return result
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
@@ -33,7 +132,10 @@ def health_check():
 @app.route('/recommend', methods=['POST'])
 def recommend():
     try:
-        data = request.json
+        data = read_json_body()
+        if data is None:
+            app.logger.warning(f"Rejected oversized request: content_length={request.content_length}")
+            return jsonify({'error': '请求内容过大'}), 413
         app.logger.info(f"Received request data: {data}")
         
         # 处理已修课程，确保与main.py一致
@@ -62,48 +164,86 @@ def recommend():
             planning_type=str(data.get('planning_type', 'Minimal Effort')),
             target_credits_per_semester=int(data['target_credits_per_semester']) if data.get('target_credits_per_semester') else None,
             preferred_subjects=preferred_subjects,  # 使用列表而不是set
-            upperbound_credits=int(data.get('upperbound_credits', 20))
+            upperbound_credits=int(data.get('upperbound_credits', 20)),
+            program=PROGRAMS.resolve(
+                str(data['program']) if data.get('program') else None,
+                major=str(data['major']) if data.get('major') else None,
+                cohort=int(data['cohort']) if data.get('cohort') else None
+            )
         )
         
         if not user_requirements.validate():
             app.logger.warning(f"Invalid input: {user_requirements}")
             return jsonify({'error': '输入信息无效，请检查后重试！'}), 400
+        if user_requirements.program is None:
+            app.logger.warning(f"No matching program for: program={data.get('program')}, "
+                               f"major={data.get('major')}, cohort={data.get('cohort')}")
+            return jsonify({'error': '未找到适用的培养方案，请检查专业和年级'}), 400
 
-        data_loader = CourseDataLoader('all_courses.json')
-        constraints = CourseConstraints(user_requirements)
-        scheduler = CourseScheduler(user_requirements, data_loader, constraints)
+        tracker = MemoryTracker(TRACK_PYTHON_HEAP)
+        constraints = CourseConstraints(
+            user_requirements, VALIDATORS[PROGRAMS.get(user_requirements.program).id]
+        )
         
-        try:
-            schedule = scheduler.solve()
-            result = {
-                'schedule': {},
-                'message': '',
-                'total_credits': schedule.get_total_credits()
-            }
-            
-            for semester, semester_schedule in schedule.schedules.items():
-                result['schedule'][semester] = {
-                    'total_credits': semester_schedule.get_total_credits(),
-                    'courses': [
-                        {
-                            'name': c.name,
-                            'credits': c.credits,
-                            'subject_category': getattr(c, 'subject_category', []) or []
-                        }
-                        for c in semester_schedule.courses
-                    ]
-                }
+        # 新生请求优先查预计算表（请求剖析时仍实际求解）
+        profile_mode = get_profile_mode()
+        if PLAN_TABLE is not None and not profile_mode:
+            with tracker.phase('plan_table'):
+                schedule = PLAN_TABLE.lookup(user_requirements)
+                violations = constraints.validate_schedule(schedule) if schedule is not None else []
+            if violations:
+                app.logger.warning(f"Plan table entry failed validation {violations}, solving instead")
+            elif schedule is not None:
+                app.logger.info("Served schedule from freshman plan table")
+                log_request_metrics(tracker, 'plan_table', 200)
+                return jsonify(build_result(schedule, user_requirements))
+
+        # 从本进程的环境池借用求解环境，求解结束后释放模型
+        with get_solver_pool().acquire() as env:
+            scheduler = CourseScheduler(user_requirements, DATA_LOADER, constraints,
+                                        stub_solver=STUB_SOLVER,
+                                        program=PROGRAMS.compile(user_requirements.program, DATA_LOADER),
+                                        env=env,
+                                        symmetry_breaking=SYMMETRY_BREAKING)
+        
+            status = 500
+            try:
+                profile_bundle = None
+                if profile_mode:
+                    with tracker.phase('profile_solve'):
+                        schedule, profile_bundle = profile_solve(
+                            scheduler, PROFILE_DIR if profile_mode == 'save' else None
+                        )
+                    app.logger.info(f"Profiled request: model_size={profile_bundle['model_size']}, "
+                                    f"create_model={profile_bundle['create_model_seconds']:.3f}s, "
+                                    f"solve={profile_bundle['solve_seconds']:.3f}s, "
+                                    f"path={profile_bundle.get('path')}")
+                else:
+                    with tracker.phase('create_model'):
+                        scheduler.create_model()
+                    with tracker.phase('solve'):
+                        schedule = scheduler.solve()
+                result = build_result(schedule, user_requirements)
             
-            if not user_requirements.study_abroad:
-                result['message'] = '注意：由于您选择不出国，请您记得在前三学期修完政治、体育、专业课以取得保研资格。'
+                if profile_bundle is not None:
+                    result['profile'] = profile_bundle if profile_mode == 'inline' else {'path': profile_bundle['path']}
                 
-            app.logger.info(f"Successfully generated schedule for user")
-            return jsonify(result)
+                app.logger.info(f"Successfully generated schedule for user")
+                status = 200
+                return jsonify(result)
             
-        except Exception as e:
-            error_info = traceback.format_exc()
-            app.logger.error(f"Error in schedule generation: {str(e)}\n{error_info}")
-            return jsonify({'error': f'求解过程中出现错误：{str(e)}'}), 500
+            except SolveLimitError as e:
+                app.logger.warning(f"Solve exceeded resource limit: {str(e)}")
+                status = 400
+                return jsonify({'error': f'{str(e)}，请调整输入后重试'}), 400
+            except Exception as e:
+                error_info = traceback.format_exc()
+                app.logger.error(f"Error in schedule generation: {str(e)}\n{error_info}")
+                return jsonify({'error': f'求解过程中出现错误：{str(e)}'}), 500
+            finally:
+                scheduler.dispose()
+                # 失败的请求同样记录指标，便于定位异常请求的内存占用
+                log_request_metrics(tracker, 'solver', status)
             
     except Exception as e:
         app.logger.error(f"Error processing request: {str(e)}", exc_info=True)
@@ -113,5 +253,9 @@ if __name__ == '__main__':
     # 生产环境配置
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
+    # 开发服务器默认多线程处理请求，Python堆统计会互相干扰
+    if TRACK_PYTHON_HEAP:
+        disable_heap_tracing()
+        app.logger.warning('Python heap tracing disabled under the threaded development server')
     
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file